@@ -5,20 +5,38 @@ Multi-agent travel planning system using local Ollama LLM
 """
 
 import os
+import re
 import sys
-import json
+import ast
+import argparse
+import asyncio
+import hashlib
+import sqlite3
 import logging
 import time
-from datetime import datetime
-from typing import Dict, List, Optional, Any
-from dataclasses import dataclass, asdict
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import operator
+from datetime import date
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, List, Optional, Any, Callable, Iterator, Tuple
+from dataclasses import dataclass
 from pathlib import Path
 
 # Third-party imports
+import orjson
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from dotenv import load_dotenv
-from crewai import Agent, Task, Crew, Process
-from langchain_community.llms import Ollama
-from crewai_tools import SerperDevTool, tool
+
+# CrewAI, LangChain and numpy take seconds to import, so they are loaded on first
+# use; --help and the requirements check return without them
+if TYPE_CHECKING:
+    import numpy as np
+    from crewai import Agent, Crew, Task
+    from langchain_community.llms import Ollama
 
 # Load environment variables
 load_dotenv()
@@ -33,12 +51,120 @@ logger = logging.getLogger(__name__)
 # Ensure required directories exist
 REPORTS_DIR = Path("reports")
 REPORTS_DIR.mkdir(exist_ok=True)
+CACHE_DIR = Path(".cache")
+CACHE_DIR.mkdir(exist_ok=True)
+
+# Dates accepted from the CLI; date.fromisoformat alone also takes forms like 2024-W01-1
+DATE_PATTERN = re.compile(r"[0-9]{4}-[0-9]{2}-[0-9]{2}")
+
+# Prefix of the result string returned when a planning run fails
+PLANNING_ERROR_PREFIX = "Error during travel planning"
+
+
+# Agents allowed to generate against the local Ollama server at the same time
+MAX_PARALLEL_AGENTS = max(int(os.getenv("MAX_PARALLEL_AGENTS", "2")), 1)
+_ollama_slots = threading.BoundedSemaphore(MAX_PARALLEL_AGENTS)
+
+# Completions are only cached when sampling is close to deterministic
+LLM_CACHE_MAX_TEMPERATURE = 0.2
+
+# Print every agent thought, tool call and observation (CLI: --verbose)
+VERBOSE = os.getenv("TRAVEL_VERBOSE", "0") == "1"
+
+# How long Ollama keeps the model loaded after each request (its default is 5m)
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+
+# Keep-alive HTTP session shared by the Ollama and Serper calls
+_HTTP = requests.Session()
+_http_adapter = HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=20,
+    max_retries=Retry(total=2, backoff_factor=0.2)
+)
+_HTTP.mount("http://", _http_adapter)
+_HTTP.mount("https://", _http_adapter)
 
 
 # ============================================================================
 # OLLAMA LLM MANAGEMENT
 # ============================================================================
 
+@lru_cache(maxsize=None)
+def _ollama_classes() -> Tuple[type, type]:
+    """Define the LangChain-based classes on first use: (TokenStreamHandler, CachedOllama)"""
+    from langchain_community.llms import Ollama
+    from langchain_core.callbacks import BaseCallbackHandler
+    from langchain_core.outputs import Generation, LLMResult
+    
+    class TokenStreamHandler(BaseCallbackHandler):
+        """Forwards generated tokens to a sink, one LLM run at a time so parallel agents don't interleave"""
+        
+        def __init__(self):
+            self.sink: Optional[Callable[[str], None]] = None
+            self._owner = None
+            self._lock = threading.Lock()
+        
+        def on_llm_new_token(self, token: str, *, run_id, **kwargs):
+            if self.sink is None:
+                return
+            with self._lock:
+                if self._owner is None:
+                    self._owner = run_id
+                elif self._owner != run_id:
+                    return
+            self.sink(token)
+        
+        def on_llm_end(self, response, *, run_id, **kwargs):
+            self._release(run_id)
+        
+        def on_llm_error(self, error, *, run_id, **kwargs):
+            self._release(run_id)
+        
+        def _release(self, run_id):
+            with self._lock:
+                if self._owner != run_id:
+                    return
+                self._owner = None
+            if self.sink is not None:
+                self.sink("\n")
+    
+    class CachedOllama(Ollama):
+        """Ollama client that caches low-temperature completions and caps concurrent generations"""
+        
+        # Turned off for the model probe, which has to reach the server
+        use_response_cache: bool = True
+        
+        def _generate(self, prompts: List[str], stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> LLMResult:
+            cacheable = (
+                self.use_response_cache
+                and self.temperature is not None
+                and self.temperature <= LLM_CACHE_MAX_TEMPERATURE
+            )
+            generations = []
+            
+            for prompt in prompts:
+                key = LLMCache.cache_key(self.model, prompt, self.temperature, stop) if cacheable else None
+                text = _llm_cache.get(key) if key else None
+                
+                if text is not None:
+                    logger.info("🔁 LLM cache hit")
+                    if run_manager:
+                        run_manager.on_llm_new_token(text)
+                    generations.append([Generation(text=text)])
+                    continue
+                
+                with _ollama_slots:
+                    result = super()._generate([prompt], stop=stop, run_manager=run_manager, **kwargs)
+                generation = result.generations[0]
+                if key:
+                    _llm_cache.set(key, generation[0].text)
+                generations.append(generation)
+            
+            return LLMResult(generations=generations)
+        
+    return TokenStreamHandler, CachedOllama
+
+
 class OllamaManager:
     """Manages Ollama LLM initialization and configuration"""
     
@@ -57,22 +183,32 @@ class OllamaManager:
         self.base_url = base_url
         self.current_model = None
         self.llm = None
-        
-    def get_available_models(self) -> List[str]:
-        """Get list of available Ollama models"""
+        self._tags_cache: Optional[Tuple[float, List[Dict]]] = None
+        # Ollama streams every completion; set token_stream.sink to see tokens as they arrive
+        token_stream_handler, _ = _ollama_classes()
+        self.token_stream = token_stream_handler()
+    
+    def _fetch_tags(self, ttl: float = 30) -> Optional[List[Dict]]:
+        """Model list from /api/tags, reused for ttl seconds; None if Ollama is unreachable"""
+        if self._tags_cache and time.monotonic() - self._tags_cache[0] < ttl:
+            return self._tags_cache[1]
         try:
-            import requests
-            response = requests.get(f"{self.base_url}/api/tags", timeout=5)
-            if response.status_code == 200:
-                models = response.json().get('models', [])
-                return [model['name'] for model in models]
-            return []
+            response = _HTTP.get(f"{self.base_url}/api/tags", timeout=5)
+            if response.status_code != 200:
+                return None
+            models = orjson.loads(response.content).get('models', [])
         except Exception as e:
             logger.warning(f"Could not fetch Ollama models: {e}")
-            return []
+            return None
+        self._tags_cache = (time.monotonic(), models)
+        return models
+        
+    def get_available_models(self) -> List[str]:
+        """Get list of available Ollama models"""
+        return [model['name'] for model in self._fetch_tags() or []]
     
-    def initialize(self) -> Ollama:
-        """Initialize Ollama with best available model"""
+    def initialize(self, verify: bool = False) -> "Ollama":
+        """Initialize Ollama with best available model; verify runs a test generation on each candidate"""
         
         logger.info("🔧 Initializing Ollama LLM...")
         
@@ -100,43 +236,52 @@ class OllamaManager:
         
         logger.info(f"📦 Found {len(available_models)} Ollama models")
         
-        # Try preferred models first
-        for model in self.PREFERRED_MODELS:
-            if model in available_models:
-                if self._try_model(model):
-                    return self.llm
+        # Preferred models first, then any other installed model
+        candidates = [model for model in self.PREFERRED_MODELS if model in available_models]
+        candidates += [model for model in available_models if model not in candidates]
         
-        # Try any available model
-        for model in available_models:
-            if self._try_model(model):
+        for model in candidates:
+            if self._try_model(model, verify):
                 return self.llm
         
         raise RuntimeError("❌ Could not initialize any Ollama model")
     
+    def _load_model(self, model_name: str):
+        """Load a model into memory; Ollama treats a generate call without a prompt as a preload"""
+        response = _HTTP.post(
+            f"{self.base_url}/api/generate",
+            json={"model": model_name, "keep_alive": OLLAMA_KEEP_ALIVE},
+            timeout=60
+        )
+        response.raise_for_status()
+    
     def _check_ollama_running(self) -> bool:
         """Check if Ollama server is running"""
-        try:
-            import requests
-            response = requests.get(f"{self.base_url}/api/tags", timeout=5)
-            return response.status_code == 200
-        except:
-            return False
+        return self._fetch_tags() is not None
     
-    def _try_model(self, model_name: str) -> bool:
-        """Try to initialize a specific model"""
+    def _try_model(self, model_name: str, verify: bool = False) -> bool:
+        """Try to initialize a specific model, loading it without generating unless verify is set"""
         try:
             logger.info(f"   Trying model: {model_name}")
             
-            llm = Ollama(
+            _, cached_ollama = _ollama_classes()
+            llm = cached_ollama(
                 model=model_name,
                 base_url=self.base_url,
                 temperature=0.1,
                 timeout=60,
-                format=""  # Disable JSON mode to help with tool calling
+                format="",  # Disable JSON mode to help with tool calling
+                keep_alive=OLLAMA_KEEP_ALIVE,  # Stay loaded between tasks
+                callbacks=[self.token_stream],
+                use_response_cache=not verify
             )
             
-            # Quick test
-            test_response = llm.invoke("Reply with OK")
+            if verify:
+                # Quick test
+                test_response = llm.invoke("Reply with OK")
+                llm.use_response_cache = True
+            else:
+                self._load_model(model_name)
             
             logger.info(f"✅ Successfully initialized Ollama with {model_name}")
             
@@ -170,81 +315,553 @@ class TravelRequest:
     def __post_init__(self):
         if self.special_requirements is None:
             self.special_requirements = []
+        
+        # Formatted once for the task prompts and reports
+        self.destinations_text = ", ".join(self.destinations)
+        self.interests_text = ", ".join(self.interests)
+        self._dict = {
+            "origin": self.origin,
+            "destinations": self.destinations,
+            "start_date": self.start_date,
+            "end_date": self.end_date,
+            "duration": self.duration,
+            "budget_range": self.budget_range,
+            "travel_style": self.travel_style,
+            "interests": self.interests,
+            "group_size": self.group_size,
+            "special_requirements": self.special_requirements,
+        }
     
     def to_dict(self) -> Dict:
-        return asdict(self)
+        """Field values as a dict, built once; callers must not modify it"""
+        return self._dict
+    
+    @classmethod
+    def from_dict(cls, data: Any) -> "TravelRequest":
+        """Build a request from untrusted input such as a batch line, raising ValueError if it is invalid"""
+        if not isinstance(data, dict):
+            raise ValueError("expected a JSON object")
+        
+        unknown = data.keys() - cls.__dataclass_fields__.keys()
+        if unknown:
+            raise ValueError(f"unknown fields: {', '.join(sorted(unknown))}")
+        
+        for name in ("origin", "start_date", "end_date", "budget_range", "travel_style"):
+            if not isinstance(data.get(name), str) or not data[name].strip():
+                raise ValueError(f"{name} must be a non-empty string")
+        
+        for name in ("destinations", "interests", "special_requirements"):
+            value = data.get(name, [] if name == "special_requirements" else None)
+            if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+                raise ValueError(f"{name} must be a list of strings")
+        if not data["destinations"]:
+            raise ValueError("destinations must not be empty")
+        
+        if not (DATE_PATTERN.fullmatch(data["start_date"]) and DATE_PATTERN.fullmatch(data["end_date"])):
+            raise ValueError("dates must be YYYY-MM-DD")
+        days = (date.fromisoformat(data["end_date"]) - date.fromisoformat(data["start_date"])).days
+        if days < 0:
+            raise ValueError("end_date is before start_date")
+        
+        # Duration defaults to the date range, as in the interactive CLI
+        data = {"duration": max(days, 1), **data}
+        for name in ("duration", "group_size"):
+            value = data.get(name)
+            if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+                raise ValueError(f"{name} must be a positive integer")
+        
+        return cls(**data)
+    
+    def cache_key(self) -> tuple:
+        """Hashable key for caching plans; destination/interest order doesn't matter"""
+        return (
+            self.origin,
+            tuple(sorted(self.destinations)),
+            self.start_date,
+            self.end_date,
+            self.duration,
+            self.budget_range,
+            self.travel_style,
+            tuple(sorted(self.interests)),
+            self.group_size,
+            tuple(self.special_requirements)
+        )
+
+
+# ============================================================================
+# CACHING
+# ============================================================================
+
+class SearchCache:
+    """Persistent search cache matching exact queries first, then near-duplicate queries by embedding.
+    
+    Queries that differ only by a place name embed almost identically, so a semantic
+    match also requires both queries to name the same capitalized words.
+    """
+    
+    TTL_SECONDS = 24 * 60 * 60
+    SIMILARITY_THRESHOLD = 0.92
+    EMBED_MODEL = "nomic-embed-text"
+    
+    def __init__(self, path: Path, base_url: str = "http://localhost:11434"):
+        self.base_url = base_url
+        self.stats = {"hits": 0, "misses": 0}
+        self._embeddings_enabled = True
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(searches)")}
+        if columns and "names" not in columns:
+            # Written before names were stored; those embeddings can't be matched safely
+            self._conn.execute("DROP TABLE searches")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS searches "
+            "(key TEXT PRIMARY KEY, result TEXT, embedding BLOB, names TEXT, created REAL)"
+        )
+        self._conn.execute("DELETE FROM searches WHERE created < ?", (time.time() - self.TTL_SECONDS,))
+        self._conn.commit()
+    
+    @staticmethod
+    def cache_key(query: str) -> str:
+        return hashlib.sha256(query.strip().lower().encode('utf-8')).hexdigest()
+    
+    @staticmethod
+    def proper_names(query: str) -> str:
+        """Capitalized words of a query (places, hotels, events), normalized for comparison"""
+        return " ".join(sorted({word.lower() for word in re.findall(r"\b[A-Z][\w'-]*", query)}))
+    
+    def get_or_search(self, query: str, search: Callable[[str], str], semantic: bool = True) -> str:
+        """Return a cached result for query, or run search and store its result.
+        
+        Semantic matching only considers entries naming the same capitalized words, and is
+        skipped for queries without any, since nothing shows which place they are about.
+        semantic=False matches only the exact query and stores no embedding.
+        """
+        key = self.cache_key(query)
+        names = self.proper_names(query)
+        cutoff = time.time() - self.TTL_SECONDS
+        
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result FROM searches WHERE key = ? AND created >= ?", (key, cutoff)
+            ).fetchone()
+        if row:
+            return self._hit(row[0], "exact")
+        
+        embedding = self._embed(query) if semantic and names else None
+        if embedding is not None:
+            result = self._nearest(embedding, names, cutoff)
+            if result is not None:
+                return self._hit(result, "semantic")
+        
+        self.stats["misses"] += 1
+        result = search(query)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO searches (key, result, embedding, names, created) VALUES (?, ?, ?, ?, ?)",
+                (key, result, embedding.tobytes() if embedding is not None else None, names, time.time())
+            )
+            self._conn.commit()
+        return result
+    
+    def _hit(self, result: str, kind: str) -> str:
+        self.stats["hits"] += 1
+        total = self.stats["hits"] + self.stats["misses"]
+        logger.info(f"🔁 Search cache {kind} hit ({self.stats['hits']}/{total} served from cache)")
+        return result
+    
+    def _nearest(self, embedding: "np.ndarray", names: str, cutoff: float) -> Optional[str]:
+        """Most similar cached result naming the same capitalized words, if above the threshold"""
+        import numpy as np
+        
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT result, embedding FROM searches "
+                "WHERE embedding IS NOT NULL AND names = ? AND created >= ?",
+                (names, cutoff)
+            ).fetchall()
+        rows = [(result, np.frombuffer(blob, dtype=np.float32)) for result, blob in rows]
+        rows = [(result, vector) for result, vector in rows if vector.shape == embedding.shape]
+        if not rows:
+            return None
+        
+        scores = np.stack([vector for _, vector in rows]) @ embedding
+        best = int(np.argmax(scores))
+        return rows[best][0] if scores[best] >= self.SIMILARITY_THRESHOLD else None
+    
+    def _embed(self, query: str) -> Optional["np.ndarray"]:
+        """Unit-length query embedding from Ollama; exact matching only if unavailable"""
+        if not self._embeddings_enabled:
+            return None
+        try:
+            import numpy as np
+            
+            response = _HTTP.post(
+                f"{self.base_url}/api/embeddings",
+                json={"model": self.EMBED_MODEL, "prompt": query.strip().lower()},
+                timeout=10
+            )
+            response.raise_for_status()
+            vector = np.asarray(orjson.loads(response.content)["embedding"], dtype=np.float32)
+            return vector / np.linalg.norm(vector)
+        except Exception as e:
+            logger.info(f"Semantic search cache disabled ({self.EMBED_MODEL} unavailable): {e}")
+            self._embeddings_enabled = False
+            return None
+
+
+class LLMCache:
+    """Persistent cache of LLM completions keyed on model, prompt, temperature and stop words"""
+    
+    TTL_SECONDS = 7 * 24 * 60 * 60
+    
+    def __init__(self, path: Path):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS completions (key TEXT PRIMARY KEY, text TEXT, created REAL)"
+        )
+        self._conn.execute("DELETE FROM completions WHERE created < ?", (time.time() - self.TTL_SECONDS,))
+        self._conn.commit()
+    
+    @staticmethod
+    def cache_key(model: str, prompt: str, temperature: float, stop: Optional[List[str]]) -> str:
+        payload = {"model": model, "prompt": prompt, "temperature": temperature, "stop": stop}
+        return hashlib.sha256(orjson.dumps(payload, option=orjson.OPT_SORT_KEYS)).hexdigest()
+    
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT text FROM completions WHERE key = ? AND created >= ?",
+                (key, time.time() - self.TTL_SECONDS)
+            ).fetchone()
+        return row[0] if row else None
+    
+    def set(self, key: str, text: str):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO completions VALUES (?, ?, ?)", (key, text, time.time())
+            )
+            self._conn.commit()
+
+
+_llm_cache = LLMCache(CACHE_DIR / "llm_cache.sqlite3")
 
 
 # ============================================================================
 # TOOLS
 # ============================================================================
 
-# Initialize search tool globally
+SERPER_SEARCH_URL = "https://google.serper.dev/search"
+SERPER_RESULTS = 10
+
+# Initialize search globally; agents only get the search tools when this succeeds
 try:
     serper_key = os.getenv("SERPER_API_KEY")
     if serper_key:
-        _search_tool = SerperDevTool(n_results=10)
+        _search_cache = SearchCache(CACHE_DIR / "search_cache.sqlite3")
         logger.info("✅ Search tool initialized")
     else:
-        _search_tool = None
+        _search_cache = None
         logger.warning("⚠️  SERPER_API_KEY not found - search will be limited")
 except Exception as e:
     logger.warning(f"⚠️  Search tool initialization failed: {e}")
-    _search_tool = None
+    _search_cache = None
 
 
-@tool
-def search_travel_info(query: str) -> str:
-    """Useful to search for travel-related information including weather, flights, hotels, attractions, restaurants, and local tips. Input should be a search query string."""
-    if not _search_tool:
-        return (
-            "Search tool unavailable. Please provide recommendations based on "
-            "your general knowledge of travel destinations, attractions, and accommodations."
-        )
+# Most Serper requests a batch search sends at once
+MAX_BATCH_SEARCHES = 8
+
+# Serper calls allowed per minute across all agents (free tier friendly)
+SERPER_CALLS_PER_MINUTE = 50
+
+
+class RateLimiter:
+    """Process-wide sliding-window limiter; acquire() blocks until a call is allowed"""
+    
+    def __init__(self, calls: int, period: float):
+        self.calls = calls
+        self.period = period
+        self._sent = []
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._sent = [t for t in self._sent if now - t < self.period]
+                if len(self._sent) < self.calls:
+                    self._sent.append(now)
+                    return
+                wait = self.period - (now - self._sent[0])
+            time.sleep(wait)
+
+
+_serper_limiter = RateLimiter(SERPER_CALLS_PER_MINUTE, 60)
+
+
+def _serper_search(query: str) -> str:
+    """Run a live Serper search over the shared session once the rate limit allows it"""
+    _serper_limiter.acquire()
+    response = _HTTP.post(
+        SERPER_SEARCH_URL,
+        headers={'X-API-KEY': os.environ['SERPER_API_KEY'], 'content-type': 'application/json'},
+        json={"q": query},
+        timeout=15
+    )
+    response.raise_for_status()
+    results = orjson.loads(response.content)
+    
+    if 'organic' not in results:
+        return str(results)
     
+    snippets = [
+        f"Title: {result['title']}\nLink: {result['link']}\nSnippet: {result['snippet']}\n---"
+        for result in results['organic'][:SERPER_RESULTS]
+        if {'title', 'link', 'snippet'} <= result.keys()
+    ]
+    return "\nSearch results: " + "\n".join(snippets) + "\n"
+
+SEARCH_UNAVAILABLE = (
+    "Search tool unavailable. Please provide recommendations based on "
+    "your general knowledge of travel destinations, attractions, and accommodations."
+)
+
+
+def _run_search(query: str, semantic: bool = True) -> str:
+    """Search through the cache, falling back to general knowledge on errors"""
     try:
-        result = _search_tool.run(query)
-        return str(result)
+        return _search_cache.get_or_search(query, _serper_search, semantic=semantic)
     except Exception as e:
         logger.warning(f"Search error: {e}")
         return "Search temporarily unavailable. Using general knowledge instead."
 
 
-@tool
+def search_travel_info(query: str) -> str:
+    """Useful to search for travel-related information including weather, flights, hotels, attractions, restaurants, and local tips. Input should be a search query string."""
+    if _search_cache is None:
+        return SEARCH_UNAVAILABLE
+    
+    return _run_search(query)
+
+
+def search_travel_info_batch(queries: List[str]) -> str:
+    """Useful to run several travel searches at once, for example the same question for each destination being compared. Input should be a list of search query strings."""
+    if _search_cache is None:
+        return SEARCH_UNAVAILABLE
+    
+    queries = list(dict.fromkeys(q.strip() for q in queries if q.strip()))
+    if not queries:
+        return "No search queries given."
+    
+    # Serper calls are network-bound, so run them side by side. Batch queries usually
+    # differ only by destination, so near-duplicate cache matches would mix cities up
+    with ThreadPoolExecutor(max_workers=min(MAX_BATCH_SEARCHES, len(queries))) as pool:
+        results = pool.map(lambda query: _run_search(query, semantic=False), queries)
+    
+    return "\n\n".join(f"### {query}\n{result}" for query, result in zip(queries, results))
+
+
+# Arithmetic allowed in calculate_expenses
+_SAFE_OPS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.USub: operator.neg,
+    ast.UAdd: operator.pos,
+}
+
+# Deletes every character an expression may contain; anything left over is invalid
+_EXPRESSION_CHARS = str.maketrans("", "", "0123456789+-*/.() \t")
+
+
+@lru_cache(maxsize=512)
+def _parse_expression(operation: str) -> ast.expr:
+    """Parse an expression once; repeated calculations skip the parser"""
+    return ast.parse(operation.strip(), mode="eval").body
+
+
+def _safe_eval(node: ast.expr) -> float:
+    """Evaluate an AST made only of numbers and + - * / operators"""
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+        return node.value
+    if isinstance(node, ast.BinOp) and type(node.op) in _SAFE_OPS:
+        return _SAFE_OPS[type(node.op)](_safe_eval(node.left), _safe_eval(node.right))
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _SAFE_OPS:
+        return _SAFE_OPS[type(node.op)](_safe_eval(node.operand))
+    raise ValueError("Only numbers and + - * / ( ) are supported")
+
+
 def calculate_expenses(operation: str) -> str:
     """Useful to perform mathematical calculations for travel budgets and expenses. Input should be a mathematical expression like '250 * 7' or '1500 + 800'. Only use numbers and operators: + - * / ( )"""
     try:
         # Safety check
-        allowed_chars = set('0123456789+-*/.() ')
-        if not all(c in allowed_chars for c in operation):
+        if operation.translate(_EXPRESSION_CHARS):
             return "Error: Invalid characters in expression"
         
-        result = eval(operation)
+        result = _safe_eval(_parse_expression(operation))
         return f"Calculation: {operation} = {result:,.2f}"
     except Exception as e:
         return f"Calculation error: {str(e)}"
 
 
+@lru_cache(maxsize=None)
+def _agent_tools() -> Dict[str, Any]:
+    """CrewAI tool wrappers for the functions above, keyed by tool name"""
+    from crewai_tools import tool
+    
+    return {
+        fn.__name__: tool(fn)
+        for fn in (search_travel_info, search_travel_info_batch, calculate_expenses)
+    }
+
+
 # ============================================================================
 # AGENT SYSTEM
 # ============================================================================
 
+# Task descriptions, filled from the request with str.format_map
+DESTINATION_ANALYSIS_TEMPLATE = """
+            **DESTINATION ANALYSIS TASK**
+            
+            Analyze and select the best destination from: {destinations_text}
+            
+            **Required Analysis:**
+            1. **Weather Conditions**: Estimate typical weather during {start_date} to {end_date}
+            2. **Cost Analysis**: Estimate flight costs from {origin} and accommodation prices
+            3. **Activities & Attractions**: Identify attractions matching these interests: {interests_text}
+            4. **Budget Compatibility**: Ensure the destination fits the {budget_range} budget
+            5. **Seasonal Considerations**: Consider festivals, events, peak/off-season factors
+            
+            **Output Requirements:**
+            Provide a clear recommendation with:
+            - Best destination and why it was chosen
+            - Expected weather conditions
+            - Estimated costs (flights, accommodation per night)
+            - Top 3-5 attractions for the interests
+            - Important considerations
+            
+            Use your knowledge to provide realistic estimates. If you can use the search tool for current 
+            information, do so, but if not, provide estimates based on your training data.
+            {batch_search_hint}
+            
+            Keep your final answer concise but informative (aim for 300-500 words).
+            """
+
+LOCAL_INSIGHTS_TEMPLATE = """
+            **LOCAL EXPERT INSIGHTS TASK**
+            
+            Based on the recommended destination, provide insider knowledge:
+            
+            **Required Information:**
+            1. **Hidden Gems**: 3-5 off-the-beaten-path locations locals love
+            2. **Cultural Tips**: Key customs, etiquette, dos and don'ts
+            3. **Authentic Dining**: 3-5 local restaurants or food experiences
+            4. **Insider Secrets**: Best times to visit attractions, crowd avoidance tips
+            5. **Practical Advice**: Transportation tips, safety considerations
+            
+            **Context:**
+            - Travel Dates: {start_date} to {end_date}
+            - Style: {travel_style}
+            - Interests: {interests_text}
+            - Group: {group_size} people
+            
+            Provide specific, actionable recommendations. Use your knowledge of the destination.
+            If you can search for current information, do so, otherwise use your training knowledge.
+            
+            Keep your final answer organized and concise (aim for 400-600 words).
+            """
+
+ITINERARY_RESEARCH_TEMPLATE = """
+            **ITINERARY RESEARCH TASK**
+            
+            For the recommended destination, gather the facts the final itinerary will need.
+            Do not write the itinerary itself.
+            
+            **Research:**
+            1. **Flights**: Typical round-trip cost from {origin} for {start_date} to {end_date}
+            2. **Accommodations**: 2-3 hotels with names, neighborhoods and price per night that suit a 
+               {travel_style} trip on a {budget_range} budget
+            3. **Dining**: Restaurants for key meals, local specialties, typical meal costs
+            4. **Transportation**: Local transport options and costs
+            5. **Totals**: Use calculate_expenses for {duration}-night totals per person and for 
+               {group_size} people
+            
+            Keep your final answer to concise research notes with names and cost figures (aim for 300-500 words).
+            """
+
+COMPLETE_ITINERARY_TEMPLATE = """
+            **ITINERARY CREATION TASK**
+            
+            Create a {duration}-day itinerary incorporating the destination analysis, 
+            local expert insights and itinerary research notes:
+            
+            **Daily Schedule:**
+            For each of {duration} days, provide:
+            - Morning activity (8 AM - 12 PM)
+            - Afternoon activity (12 PM - 6 PM)  
+            - Evening activity (6 PM onwards)
+            - Include specific venue names and what makes them special
+            - Consider realistic timing and travel between locations
+            
+            **Accommodations:**
+            - Recommend 2-3 hotels with names and neighborhoods
+            - Explain why each suits the {travel_style} style
+            - Estimate price per night
+            
+            **Dining:**
+            - Suggest restaurants for key meals
+            - Include local specialties to try
+            - Estimate meal costs
+            
+            **Budget Summary:**
+            Provide clear cost breakdown:
+            - Flights from {origin}: $X
+            - Accommodation ({duration} nights): $X
+            - Food (daily estimate × {duration}): $X
+            - Activities/attractions: $X
+            - Transportation: $X
+            - **Total per person: $X**
+            - **Total for {group_size} people: $X**
+            
+            **Practical Info:**
+            - Transportation tips
+            - Packing suggestions for the weather
+            - Emergency contacts
+            
+            Context: {start_date} to {end_date}, {budget_range} budget, 
+            interests: {interests_text}
+            
+            Format as organized markdown. Be specific with venue names. Provide realistic cost estimates.
+            Keep each day's plan focused and realistic.
+            """
+
+
 class TravelPlannerAgents:
     """Travel planning agent system using Ollama"""
     
-    def __init__(self):
+    # Progress messages reported by plan_trip_stream, indexed by completed tasks
+    PHASES = [
+        "🔍 Phase 1/3: Analyzing destinations and comparing options...",
+        "🗺️ Phase 2/3: Gathering local insights and researching hotels, flights and dining...",
+        "🗺️ Phase 2/3: Gathering local insights and researching hotels, flights and dining...",
+        "📋 Phase 3/3: Finalizing itinerary and budget..."
+    ]
+    
+    def __init__(self, verify_model: bool = False, verbose: bool = VERBOSE):
         self.ollama_manager = OllamaManager()
+        self.verify_model = verify_model
+        self.verbose = verbose
         self.llm = self._initialize_llm()
-        self.agents = self._create_agents()
     
-    def _initialize_llm(self) -> Ollama:
+    def _initialize_llm(self) -> "Ollama":
         """Initialize Ollama LLM"""
         try:
             # Force disable OpenAI
             os.environ["OPENAI_API_KEY"] = ""
             os.environ["OPENAI_MODEL_NAME"] = ""
             
-            llm = self.ollama_manager.initialize()
+            llm = self.ollama_manager.initialize(verify=self.verify_model)
             
             # Configure for better tool usage
             if hasattr(llm, 'temperature'):
@@ -258,204 +875,271 @@ class TravelPlannerAgents:
             logger.error(f"❌ LLM initialization failed: {e}")
             raise
     
-    def _create_agents(self) -> Dict[str, Agent]:
+    def _create_agents(self) -> Dict[str, "Agent"]:
         """Create the travel planning agents"""
+        from crewai import Agent
+        
         agents = {}
+        tools = _agent_tools()
+        search_travel_info = tools['search_travel_info']
+        search_travel_info_batch = tools['search_travel_info_batch']
+        calculate_expenses = tools['calculate_expenses']
+        
+        # Without a Serper key the search tools only return a stub, so agents don't get them
+        search_enabled = _search_cache is not None
+        if search_enabled:
+            analyst_search_note = (
+                "For search queries, use the search_travel_info tool, "
+                "or search_travel_info_batch to look up several destinations in one step."
+            )
+            local_search_note = "When you need current information, use the search_travel_info tool."
+            concierge_search_note = "Use search_travel_info for researching hotels, restaurants, and attractions."
+        else:
+            analyst_search_note = local_search_note = concierge_search_note = (
+                "Web search is not available, so rely on your own knowledge of destinations."
+            )
         
         agents['destination_analyst'] = Agent(
             role="Travel Destination Analyst",
             goal="Analyze and recommend the best travel destination based on multiple criteria",
-            backstory="""You are an expert travel analyst with extensive knowledge of global destinations. 
+            backstory=f"""You are an expert travel analyst with extensive knowledge of global destinations. 
             You excel at comparing cities based on weather patterns, costs, activities, and matching 
             destinations to traveler preferences. You provide data-driven recommendations with clear reasoning.
             
-            When you need information, use your available tools. For search queries, use the search_travel_info tool.
+            When you need information, use your available tools. {analyst_search_note}
             For calculations, use the calculate_expenses tool.""",
-            tools=[search_travel_info, calculate_expenses],
+            tools=[search_travel_info, search_travel_info_batch, calculate_expenses] if search_enabled else [calculate_expenses],
             llm=self.llm,
-            verbose=True,
+            verbose=self.verbose,
             allow_delegation=False,
-            max_iter=15,
-            max_rpm=10
+            max_iter=6
         )
         
         agents['local_expert'] = Agent(
             role="Local Travel Expert",
             goal="Provide insider knowledge and authentic local recommendations for destinations",
-            backstory="""You are a seasoned local travel expert who has lived in cities around the world. 
+            backstory=f"""You are a seasoned local travel expert who has lived in cities around the world. 
             You know the hidden gems, local customs, authentic restaurants, cultural insights, and practical 
             tips that help travelers experience destinations like locals rather than tourists.
             
-            When you need current information, use the search_travel_info tool.""",
-            tools=[search_travel_info],
+            {local_search_note}""",
+            tools=[search_travel_info] if search_enabled else [],
             llm=self.llm,
-            verbose=True,
+            verbose=self.verbose,
             allow_delegation=False,
-            max_iter=15,
-            max_rpm=10
+            max_iter=4
         )
         
         agents['travel_concierge'] = Agent(
             role="Travel Concierge Specialist",
             goal="Create comprehensive travel itineraries with detailed logistics and planning",
-            backstory="""You are a professional travel concierge with expertise in creating detailed, 
+            backstory=f"""You are a professional travel concierge with expertise in creating detailed, 
             practical travel itineraries. You excel at logistics coordination, timing optimization, 
             accommodation selection, restaurant recommendations, and budget planning. You ensure every 
             aspect of the trip is well-organized and memorable.
             
-            Use search_travel_info for researching hotels, restaurants, and attractions. Use calculate_expenses 
+            {concierge_search_note} Use calculate_expenses 
             for budget calculations.""",
-            tools=[search_travel_info, calculate_expenses],
+            tools=[search_travel_info, calculate_expenses] if search_enabled else [calculate_expenses],
             llm=self.llm,
-            verbose=True,
+            verbose=self.verbose,
             allow_delegation=False,
-            max_iter=15,
-            max_rpm=10
+            max_iter=8
         )
         
         logger.info(f"✅ Created {len(agents)} travel planning agents")
         return agents
     
-    def create_tasks(self, request: TravelRequest) -> List[Task]:
-        """Create tasks for the travel planning workflow"""
+    def create_tasks(
+        self,
+        request: TravelRequest,
+        agents: Dict[str, "Agent"],
+        callback: Optional[Callable] = None
+    ) -> List["Task"]:
+        """Create tasks for the travel planning workflow, assigned to the given agents"""
+        from crewai import Task
+        
+        batch_search_hint = (
+            "When comparing multiple destinations, call search_travel_info_batch once with one query per "
+            "destination instead of searching for each destination separately."
+        ) if _search_cache is not None else ""
+        fields = {
+            **request.to_dict(),
+            "destinations_text": request.destinations_text,
+            "interests_text": request.interests_text,
+            "batch_search_hint": batch_search_hint,
+        }
         
         destination_analysis = Task(
-            description=f"""
-            **DESTINATION ANALYSIS TASK**
-            
-            Analyze and select the best destination from: {', '.join(request.destinations)}
-            
-            **Required Analysis:**
-            1. **Weather Conditions**: Estimate typical weather during {request.start_date} to {request.end_date}
-            2. **Cost Analysis**: Estimate flight costs from {request.origin} and accommodation prices
-            3. **Activities & Attractions**: Identify attractions matching these interests: {', '.join(request.interests)}
-            4. **Budget Compatibility**: Ensure the destination fits the {request.budget_range} budget
-            5. **Seasonal Considerations**: Consider festivals, events, peak/off-season factors
-            
-            **Output Requirements:**
-            Provide a clear recommendation with:
-            - Best destination and why it was chosen
-            - Expected weather conditions
-            - Estimated costs (flights, accommodation per night)
-            - Top 3-5 attractions for the interests
-            - Important considerations
-            
-            Use your knowledge to provide realistic estimates. If you can use the search tool for current 
-            information, do so, but if not, provide estimates based on your training data.
-            
-            Keep your final answer concise but informative (aim for 300-500 words).
-            """,
-            agent=self.agents['destination_analyst'],
-            expected_output="A clear destination recommendation with weather overview, cost estimates, and top attractions"
+            description=DESTINATION_ANALYSIS_TEMPLATE.format_map(fields),
+            agent=agents['destination_analyst'],
+            expected_output="A clear destination recommendation with weather overview, cost estimates, and top attractions",
+            callback=callback
         )
         
         local_expert_insights = Task(
-            description=f"""
-            **LOCAL EXPERT INSIGHTS TASK**
-            
-            Based on the recommended destination, provide insider knowledge:
-            
-            **Required Information:**
-            1. **Hidden Gems**: 3-5 off-the-beaten-path locations locals love
-            2. **Cultural Tips**: Key customs, etiquette, dos and don'ts
-            3. **Authentic Dining**: 3-5 local restaurants or food experiences
-            4. **Insider Secrets**: Best times to visit attractions, crowd avoidance tips
-            5. **Practical Advice**: Transportation tips, safety considerations
-            
-            **Context:**
-            - Travel Dates: {request.start_date} to {request.end_date}
-            - Style: {request.travel_style}
-            - Interests: {', '.join(request.interests)}
-            - Group: {request.group_size} people
-            
-            Provide specific, actionable recommendations. Use your knowledge of the destination.
-            If you can search for current information, do so, otherwise use your training knowledge.
-            
-            Keep your final answer organized and concise (aim for 400-600 words).
-            """,
-            agent=self.agents['local_expert'],
+            description=LOCAL_INSIGHTS_TEMPLATE.format_map(fields),
+            agent=agents['local_expert'],
             expected_output="Practical local expert guide with hidden gems, dining spots, cultural tips, and insider advice",
-            dependencies=[destination_analysis]
+            context=[destination_analysis],
+            async_execution=True,
+            callback=callback
+        )
+        
+        # Runs alongside local_expert_insights; both only need the destination pick
+        itinerary_research = Task(
+            description=ITINERARY_RESEARCH_TEMPLATE.format_map(fields),
+            agent=agents['travel_concierge'],
+            expected_output="Research notes with flight, hotel, dining and transport options and cost figures",
+            context=[destination_analysis],
+            async_execution=True,
+            callback=callback
         )
         
         complete_itinerary = Task(
-            description=f"""
-            **ITINERARY CREATION TASK**
-            
-            Create a {request.duration}-day itinerary incorporating previous insights:
-            
-            **Daily Schedule:**
-            For each of {request.duration} days, provide:
-            - Morning activity (8 AM - 12 PM)
-            - Afternoon activity (12 PM - 6 PM)  
-            - Evening activity (6 PM onwards)
-            - Include specific venue names and what makes them special
-            - Consider realistic timing and travel between locations
-            
-            **Accommodations:**
-            - Recommend 2-3 hotels with names and neighborhoods
-            - Explain why each suits the {request.travel_style} style
-            - Estimate price per night
-            
-            **Dining:**
-            - Suggest restaurants for key meals
-            - Include local specialties to try
-            - Estimate meal costs
-            
-            **Budget Summary:**
-            Provide clear cost breakdown:
-            - Flights from {request.origin}: $X
-            - Accommodation ({request.duration} nights): $X
-            - Food (daily estimate × {request.duration}): $X
-            - Activities/attractions: $X
-            - Transportation: $X
-            - **Total per person: $X**
-            - **Total for {request.group_size} people: $X**
-            
-            **Practical Info:**
-            - Transportation tips
-            - Packing suggestions for the weather
-            - Emergency contacts
-            
-            Context: {request.start_date} to {request.end_date}, {request.budget_range} budget, 
-            interests: {', '.join(request.interests)}
-            
-            Format as organized markdown. Be specific with venue names. Provide realistic cost estimates.
-            Keep each day's plan focused and realistic.
-            """,
-            agent=self.agents['travel_concierge'],
+            description=COMPLETE_ITINERARY_TEMPLATE.format_map(fields),
+            agent=agents['travel_concierge'],
             expected_output="Complete itinerary with daily schedule, accommodations, dining, budget breakdown, and practical tips in markdown format",
-            dependencies=[destination_analysis, local_expert_insights]
+            context=[destination_analysis, local_expert_insights, itinerary_research],
+            callback=callback
         )
         
-        return [destination_analysis, local_expert_insights, complete_itinerary]
+        return [destination_analysis, local_expert_insights, itinerary_research, complete_itinerary]
     
-    def plan_trip(self, request: TravelRequest) -> str:
-        """Execute the travel planning workflow"""
+    def plan_trip(self, request: TravelRequest, on_token: Optional[Callable[[str], None]] = None) -> str:
+        """Execute the travel planning workflow, passing generated tokens to on_token as they arrive"""
+        self.ollama_manager.token_stream.sink = on_token
         try:
-            logger.info("🚀 Starting travel planning workflow")
-            logger.info(f"📡 Using Ollama model: {self.ollama_manager.current_model}")
-            
-            tasks = self.create_tasks(request)
-            
-            crew = Crew(
-                agents=list(self.agents.values()),
-                tasks=tasks,
-                process=Process.sequential,
-                verbose=True
-            )
-            
-            logger.info("⚙️  Executing travel planning workflow...")
-            logger.info("⏳ This may take several minutes with local LLM processing...")
-            
-            result = crew.kickoff(inputs=request.to_dict())
-            
-            logger.info("✅ Travel planning completed successfully")
-            return str(result)
-            
+            return self._kickoff(request)
         except Exception as e:
             logger.error(f"❌ Travel planning failed: {e}")
-            return f"Error during travel planning: {str(e)}"
+            return f"{PLANNING_ERROR_PREFIX}: {str(e)}"
+        finally:
+            self.ollama_manager.token_stream.sink = None
+    
+    def plan_trip_stream(self, request: TravelRequest) -> Iterator[Tuple[str, int, str]]:
+        """Execute the travel planning workflow, yielding (phase, percent, partial_text) as tasks finish"""
+        completed = queue.Queue()
+        outcome = {}
+        
+        def run():
+            try:
+                outcome['result'] = self._kickoff(request, callback=completed.put)
+            except Exception as e:
+                logger.error(f"❌ Travel planning failed: {e}")
+                outcome['result'] = f"{PLANNING_ERROR_PREFIX}: {str(e)}"
+            finally:
+                completed.put(None)
+        
+        worker = threading.Thread(target=run, name="travel-planner", daemon=True)
+        worker.start()
+        
+        yield self.PHASES[0], 5, ""
+        
+        done = 0
+        while (output := completed.get()) is not None:
+            done += 1
+            pct = 5 + 90 * done // len(self.PHASES)
+            phase = self.PHASES[done] if done < len(self.PHASES) else self.PHASES[-1]
+            yield phase, pct, str(output.raw_output)
+        
+        worker.join()
+        yield "✅ Complete! Your personalized travel plan is ready!", 100, outcome['result']
+    
+    def plan_trips(self, travel_requests: List[TravelRequest], max_concurrent: int = 3) -> List[str]:
+        """Plan several trips at once, returning results in request order; failures become error strings"""
+        return asyncio.run(self._plan_trips(travel_requests, max_concurrent))
+    
+    async def _plan_trips(self, travel_requests: List[TravelRequest], max_concurrent: int) -> List[str]:
+        slots = asyncio.Semaphore(max_concurrent)
+        
+        async def plan(request: TravelRequest) -> str:
+            async with slots:
+                crew = self._build_crew(request)
+                # crewai 0.30 has no kickoff_async; run the blocking kickoff on a worker thread
+                return str(await asyncio.to_thread(crew.kickoff, inputs=request.to_dict()))
+        
+        results = await asyncio.gather(*(plan(request) for request in travel_requests), return_exceptions=True)
+        
+        for request, result in zip(travel_requests, results):
+            if isinstance(result, Exception):
+                logger.error(f"❌ Travel planning failed for {request.origin} → {request.destinations_text}: {result}")
+        return [
+            f"{PLANNING_ERROR_PREFIX}: {result}" if isinstance(result, Exception) else result
+            for result in results
+        ]
+    
+    def _build_crew(self, request: TravelRequest, callback: Optional[Callable] = None) -> "Crew":
+        """Crew running the planning tasks for one request"""
+        from crewai import Crew, Process
+        
+        # Agents keep per-run state and the planner is shared across app sessions and
+        # batch runs, so every crew gets its own agents
+        agents = self._create_agents()
+        
+        # Async tasks start back to back; the final task joins them through its context
+        return Crew(
+            agents=list(agents.values()),
+            tasks=self.create_tasks(request, agents, callback=callback),
+            process=Process.sequential,
+            verbose=self.verbose
+        )
+    
+    def _kickoff(self, request: TravelRequest, callback: Optional[Callable] = None) -> str:
+        """Build the crew for a request and run it to completion"""
+        logger.info("🚀 Starting travel planning workflow")
+        logger.info(f"📡 Using Ollama model: {self.ollama_manager.current_model}")
+        
+        crew = self._build_crew(request, callback=callback)
+        
+        logger.info("⚙️  Executing travel planning workflow...")
+        logger.info("⏳ This may take several minutes with local LLM processing...")
+        
+        result = crew.kickoff(inputs=request.to_dict())
+        
+        logger.info("✅ Travel planning completed successfully")
+        return str(result)
+
+
+# ============================================================================
+# REPORTS
+# ============================================================================
+
+# Closing lines of every saved report
+REPORT_FOOTER = """
+
+---
+
+*Generated by AI Travel Planner powered by Ollama*
+*All recommendations are AI-generated. Please verify details before booking.*
+"""
+
+
+def plan_report_parts(result: str, request: TravelRequest, model: str) -> List[str]:
+    """Build the saved report as a list of chunks so it can be written without joining"""
+    return [
+        "# Travel Plan\n",
+        f"**Generated:** {time.strftime('%Y-%m-%d %H:%M:%S')}\n",
+        f"**AI Model:** {model}\n",
+        "\n## Trip Summary\n",
+        f"- **Origin:** {request.origin}\n",
+        f"- **Destination Options:** {request.destinations_text}\n",
+        f"- **Travel Dates:** {request.start_date} to {request.end_date}\n",
+        f"- **Duration:** {request.duration} days\n",
+        f"- **Group Size:** {request.group_size} travelers\n",
+        f"- **Budget Range:** {request.budget_range}\n",
+        f"- **Travel Style:** {request.travel_style}\n",
+        f"- **Interests:** {request.interests_text}\n",
+        "\n---\n\n## Travel Plan\n\n",
+        result,
+        REPORT_FOOTER,
+    ]
+
+
+def write_report(filepath: Path, parts: List[str]):
+    """Write report parts through a 64 KiB buffer instead of one combined string"""
+    with filepath.open('w', encoding='utf-8', buffering=65536) as f:
+        f.writelines(parts)
 
 
 # ============================================================================
@@ -465,8 +1149,8 @@ class TravelPlannerAgents:
 class TravelPlannerApp:
     """Main application class"""
     
-    def __init__(self):
-        self.planner = TravelPlannerAgents()
+    def __init__(self, verify_model: bool = False, verbose: bool = VERBOSE):
+        self.planner = TravelPlannerAgents(verify_model=verify_model, verbose=verbose)
     
     def run_cli(self):
         """Run the command-line interface"""
@@ -484,7 +1168,10 @@ class TravelPlannerApp:
             print(f"🤖 Using local Ollama AI for processing")
             print("⏳ Processing may take 5-10 minutes for complete itinerary...\n")
             
-            result = self.planner.plan_trip(request)
+            # The raw token stream includes every Thought/Action/Observation, so it is
+            # only echoed alongside CrewAI's own verbose output
+            on_token = self._print_token if self.planner.verbose else None
+            result = self.planner.plan_trip(request, on_token=on_token)
             
             self._display_results(result)
             self._save_plan(result, request)
@@ -495,6 +1182,29 @@ class TravelPlannerApp:
             logger.error(f"Application error: {e}")
             print(f"\n❌ Error: {e}")
     
+    def run_batch(self, path: Path):
+        """Plan every request in a JSON Lines file (one TravelRequest object per line) and save each plan"""
+        requests_to_plan = []
+        for line_number, line in enumerate(path.read_text(encoding='utf-8').splitlines(), 1):
+            if not line.strip():
+                continue
+            try:
+                requests_to_plan.append(TravelRequest.from_dict(orjson.loads(line)))
+            except ValueError as e:
+                print(f"⚠️  Skipping line {line_number} of {path}: {e}")
+        
+        if not requests_to_plan:
+            print(f"❌ No valid travel requests found in {path}")
+            return
+        
+        print(f"\n🚀 Planning {len(requests_to_plan)} trips from {path}...")
+        print("⏳ Processing may take several minutes per trip...\n")
+        
+        results = self.planner.plan_trips(requests_to_plan)
+        
+        for index, (request, result) in enumerate(zip(requests_to_plan, results), 1):
+            self._save_plan(result, request, suffix=f"_{index}")
+    
     def _get_user_input(self) -> TravelRequest:
         """Get travel planning input from user"""
         print("\n📝 Let's plan your perfect trip:\n")
@@ -508,10 +1218,12 @@ class TravelPlannerApp:
         end_date = input("📅 End date (YYYY-MM-DD): ").strip()
         
         try:
-            start = datetime.strptime(start_date, "%Y-%m-%d")
-            end = datetime.strptime(end_date, "%Y-%m-%d")
+            if not (DATE_PATTERN.fullmatch(start_date) and DATE_PATTERN.fullmatch(end_date)):
+                raise ValueError("dates must be YYYY-MM-DD")
+            start = date.fromisoformat(start_date)
+            end = date.fromisoformat(end_date)
             duration = max((end - start).days, 1)
-        except:
+        except ValueError:
             duration = 7
             print("⚠️  Invalid dates, defaulting to 7 days")
         
@@ -550,6 +1262,11 @@ class TravelPlannerApp:
             group_size=group_size
         )
     
+    @staticmethod
+    def _print_token(token: str):
+        """Echo agent output to the terminal while it is generated"""
+        print(token, end="", flush=True)
+    
     def _display_results(self, result: str):
         """Display results"""
         print("\n" + "="*70)
@@ -560,40 +1277,15 @@ class TravelPlannerApp:
         print("Have an amazing trip! 🌍✈️🎒")
         print("="*70)
     
-    def _save_plan(self, result: str, request: TravelRequest):
-        """Save the travel plan"""
+    def _save_plan(self, result: str, request: TravelRequest, suffix: str = ""):
+        """Save the travel plan; suffix keeps plans saved in the same second apart"""
         try:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"travel_plan_{timestamp}.md"
+            timestamp = time.strftime("%Y%m%d_%H%M%S")
+            filename = f"travel_plan_{timestamp}{suffix}.md"
             filepath = REPORTS_DIR / filename
             
-            content = f"""# Travel Plan
-**Generated:** {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
-**AI Model:** {self.planner.ollama_manager.current_model}
-
-## Trip Summary
-- **Origin:** {request.origin}
-- **Destination Options:** {', '.join(request.destinations)}
-- **Travel Dates:** {request.start_date} to {request.end_date}
-- **Duration:** {request.duration} days
-- **Group Size:** {request.group_size} travelers
-- **Budget Range:** {request.budget_range}
-- **Travel Style:** {request.travel_style}
-- **Interests:** {', '.join(request.interests)}
-
----
-
-## Travel Plan
-
-{result}
-
----
-
-*Generated by AI Travel Planner powered by Ollama*
-*All recommendations are AI-generated. Please verify details before booking.*
-"""
-            
-            filepath.write_text(content, encoding='utf-8')
+            parts = plan_report_parts(result, request, self.planner.ollama_manager.current_model)
+            write_report(filepath, parts)
             print(f"\n💾 Travel plan saved to: {filepath}")
             
         except Exception as e:
@@ -603,16 +1295,15 @@ class TravelPlannerApp:
 
 def check_system_requirements():
     """Check if all system requirements are met"""
-    print("\n🔍 Checking system requirements...\n")
+    logger.info("🔍 Checking system requirements...")
     
     issues = []
     
     # Check Ollama
     try:
-        import requests
-        response = requests.get("http://localhost:11434/api/tags", timeout=5)
+        response = _HTTP.get("http://localhost:11434/api/tags", timeout=5)
         if response.status_code == 200:
-            models = response.json().get('models', [])
+            models = orjson.loads(response.content).get('models', [])
             logger.info(f"✅ Ollama is running with {len(models)} models")
             
             if not models:
@@ -646,6 +1337,25 @@ def check_system_requirements():
 
 def main():
     """Main function"""
+    parser = argparse.ArgumentParser(description="AI Travel Planner powered by local Ollama models")
+    parser.add_argument(
+        "--verify-model",
+        action="store_true",
+        help="run a test generation before using the selected model"
+    )
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        default=VERBOSE,
+        help="print every agent thought, tool call and observation (or set TRAVEL_VERBOSE=1)"
+    )
+    parser.add_argument(
+        "--batch",
+        type=Path,
+        metavar="REQUESTS_JSONL",
+        help="plan every trip in a JSON Lines file of travel requests instead of asking interactively"
+    )
+    args = parser.parse_args()
     
     # Check system requirements
     issues = check_system_requirements()
@@ -660,8 +1370,11 @@ def main():
     print("\n✅ All requirements met!\n")
     
     try:
-        app = TravelPlannerApp()
-        app.run_cli()
+        app = TravelPlannerApp(verify_model=args.verify_model, verbose=args.verbose)
+        if args.batch:
+            app.run_batch(args.batch)
+        else:
+            app.run_cli()
         
     except Exception as e:
         logger.error(f"Application failed: {e}")